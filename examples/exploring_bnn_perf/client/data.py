@@ -3,7 +3,6 @@ Managing the inputs and labels for the function under test.
 """
 
 import numpy as np
-from sklearn.discriminant_analysis import StandardScaler
 import torch
 
 from torch import Tensor
@@ -12,14 +11,17 @@ from torch.utils.data import Dataset
 
 def f(a: Tensor, b: Tensor) -> Tensor:
     # f(a, b) = \frac{1}{5}a^{2}-\frac{1}{10}b^{3}
-    return (1 / 5 * a**2) - (1 / 10 * b**3)
+    # Written as plain multiplies: ** dispatches through the generic pow path,
+    # while a*a fuses into the surrounding elementwise kernels.
+    return 0.2 * a * a - 0.1 * b * b * b
 
 
 class FutData(Dataset):
     """
     Manages the training data for the simple function @f. Includes properties for
-    standardized and unstandardized input and output data. Used in conjunction with
-    pytorch's DataLoader to manage creating training batches.
+    standardized and unstandardized input and output data. Training batches are
+    sliced straight out of the tensors returned by as_tensors(); the Dataset
+    indexing hooks remain for DataLoader-based consumers.
     """
 
     def __init__(self, data_size):
@@ -31,18 +33,24 @@ class FutData(Dataset):
         self.a = torch.linspace(-6, 6, root)
         self.b = torch.linspace(-6, 6, root)
 
-        self.inputs = torch.cartesian_prod(self.a, self.b)
-        self.targets = f(*self.inputs.T).reshape(-1, 1)
+        # Evaluating f on the 2D grids keeps everything elementwise in float32;
+        # no (N, 2) cartesian product needs to be materialized for the targets.
+        A, B = torch.meshgrid(self.a, self.b, indexing="ij")
+        inputs = torch.stack([A.reshape(-1), B.reshape(-1)], 1)
+        targets = f(A, B).reshape(-1, 1)
 
-        self.input_scaler = StandardScaler()
-        self.target_scaler = StandardScaler()
+        self.input_mean = inputs.mean(0)
+        self.input_std = inputs.std(0, unbiased=False)
+        self.target_mean = targets.mean(0)
+        self.target_std = targets.std(0, unbiased=False)
 
-        self.inputs = torch.tensor(
-            self.input_scaler.fit_transform(self.inputs), dtype=torch.float32
-        )
-        self.targets = torch.tensor(
-            self.target_scaler.fit_transform(self.targets), dtype=torch.float32
-        )
+        self.inputs = (inputs - self.input_mean) / self.input_std
+        self.targets = (targets - self.target_mean) / self.target_std
+
+        # Per-column views of the input stats, so the classify path can build
+        # the (a, b) ground-truth columns without a (K, 2) intermediate
+        self._col_mean = self.input_mean.unbind(0)
+        self._col_std = self.input_std.unbind(0)
 
         self.input_min = self.inputs_std.min().item()
         self.input_max = self.inputs_std.max().item()
@@ -55,7 +63,7 @@ class FutData(Dataset):
     @property
     def inputs_nonstd(self):
         "Non-standardized inputs"
-        return self.input_scaler.inverse_transform(self.inputs)
+        return self.inputs * self.input_std + self.input_mean
 
     @property
     def targets_std(self):
@@ -65,7 +73,22 @@ class FutData(Dataset):
     @property
     def targets_nonstd(self):
         "Non-standardized labels"
-        return self.target_scaler.inverse_transform(self.targets)
+        return self.targets * self.target_std + self.target_mean
+
+    def inverse_transform_inputs(self, x: Tensor) -> Tensor:
+        "Transforms standardized inputs back to the domain of @f"
+        return x * self.input_std + self.input_mean
+
+    def inverse_input_columns(self, x: Tensor) -> tuple[Tensor, Tensor]:
+        "The unstandardized (a, b) columns of @x as two fused 1-D computes"
+        return (
+            x[:, 0] * self._col_std[0] + self._col_mean[0],
+            x[:, 1] * self._col_std[1] + self._col_mean[1],
+        )
+
+    def transform_targets(self, y: Tensor) -> Tensor:
+        "Standardizes raw outputs of @f to the model's target domain"
+        return (y - self.target_mean) / self.target_std
 
     def transform_request(self, x: Tensor) -> Tensor:
         "Transforms request from SEMBAS to the input domain of a model for @f"
@@ -75,6 +98,10 @@ class FutData(Dataset):
         "Transforms from input domain to SEMBAS request domain (i.e. normalized domain)"
         return (x - self.input_min) / (self.input_max - self.input_min)
 
+    def as_tensors(self) -> tuple[Tensor, Tensor]:
+        "The full (inputs, targets) tensors; prefer this over per-item indexing."
+        return self.inputs, self.targets
+
     def __len__(self):
         return self.data_size
 
@@ -85,6 +112,14 @@ class FutData(Dataset):
             self.targets[idx],
         )
 
+    def __getitems__(self, indices):
+        """
+        Batched fetch; lets DataLoader skip per-item __getitem__ dispatch.
+        Returns a list of per-sample (input, target) pairs, as default_collate
+        expects (cf. TensorDataset.__getitems__).
+        """
+        return list(zip(self.inputs[indices], self.targets[indices]))
+
     def __iter__(self):
         # Used for unpacking. e.g. x, y = futData
         yield self.inputs
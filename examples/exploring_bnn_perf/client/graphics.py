@@ -1,3 +1,5 @@
+import functools
+
 import matplotlib.pyplot as plt
 import numpy as np
 import torch
@@ -42,6 +44,14 @@ def sample_graph(samples: list[tuple[ndarray, bool]], ax: Axes = None):
     ax.legend()
 
 
+@functools.lru_cache(maxsize=8)
+def _grid(n: int) -> torch.Tensor:
+    "The normalized n x n search grid as a (n*n, 2) tensor, cached per n."
+    lin = torch.linspace(0, 1, n)
+    A, B = torch.meshgrid(lin, lin, indexing="xy")
+    return torch.stack([A.reshape(-1), B.reshape(-1)], 1)
+
+
 def brute_force_search(
     network: Module, dataset: FutData, classifier, n=100, ax: Axes = None
 ):
@@ -52,14 +62,7 @@ def brute_force_search(
     if ax is None:
         fig, ax = plt.subplots()
 
-    A, B = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
-    A = A.flatten()
-    B = B.flatten()
-    x = np.vstack((A, B)).T
-
-    y_cls: torch.Tensor = classifier(
-        network, dataset, torch.tensor(x, dtype=torch.float32)
-    )
+    y_cls: torch.Tensor = classifier(network, dataset, _grid(n))
 
-    ax.imshow(np.flip(y_cls.reshape((n, n)), 0))
+    ax.imshow(torch.flipud(y_cls.reshape((n, n))))
     ax.set_title("Validity Graph")
@@ -2,7 +2,6 @@
 This script depends on:
 * pytorch
 * numpy (1.2.x)
-* sklearn
 * matplotlib
 * rtree (for analysis)
 """
@@ -12,6 +11,12 @@ import torch
 import argparse
 import os
 
+try:
+    # Optional: fuses the validity check into a single SIMD pass on CPU
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 import torch.optim as optim
 
 from torch import Tensor
@@ -24,6 +29,9 @@ from sembas_api import *
 
 THRESHOLD = 0.5
 
+# The 2-50-1 matmuls don't need full fp32 accumulation; allow TF32 where supported
+torch.set_float32_matmul_precision("high")
+
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -131,7 +139,11 @@ def train_and_save(dataset: FutData, path: str, model_name: str):
 
     optimizer = optim.Adam(bnn.parameters(), lr=0.01)
 
-    test_history, train_history = train_bnn(bnn, optimizer, dataset, epochs=2)
+    # Train through a compiled wrapper so the Linear->ReLU->Linear chain runs
+    # as fused kernels; bnn keeps the plain state_dict for saving/loading.
+    compiled_bnn = torch.compile(bnn, mode="max-autotune")
+
+    test_history, train_history = train_bnn(compiled_bnn, optimizer, dataset, epochs=2)
     os.makedirs(path, exist_ok=True)
     torch.save(bnn.state_dict(), f"{path}/{model_name}")
     return test_history, train_history
@@ -145,6 +157,48 @@ def load_bnn(path: str):
     return model
 
 
+@torch.jit.script
+def _validity(
+    net_out: Tensor,
+    true_a: Tensor,
+    true_b: Tensor,
+    target_mean: Tensor,
+    target_std: Tensor,
+    threshold: float,
+) -> Tensor:
+    """
+    Fused squared-error check of the network output against the (standardized)
+    ground truth of f. Scripted so the whole comparison runs as one kernel
+    instead of a chain of eager ops.
+    """
+    truth = (
+        0.2 * true_a * true_a - 0.1 * true_b * true_b * true_b - target_mean
+    ) / target_std
+    err = net_out.squeeze(-1) - truth
+    return err * err < threshold
+
+
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fused_valid(pred, true_a, true_b, t_mu, t_sigma, threshold, out):
+        """
+        Same check as _validity, compiled to one pass over memory with no
+        intermediate arrays; writes uint8 classes into the preallocated @out.
+        """
+        for i in prange(pred.shape[0]):
+            truth = (
+                0.2 * true_a[i] * true_a[i]
+                - 0.1 * true_b[i] * true_b[i] * true_b[i]
+                - t_mu
+            ) / t_sigma
+            err = pred[i] - truth
+            out[i] = err * err < threshold
+
+else:
+    _fused_valid = None
+
+
 def classify_validity(network: Module, dataset: FutData, x: Tensor):
     """
     Given a network, classifiers a sample as valid/invalid.
@@ -157,6 +211,8 @@ def classify_validity(network: Module, dataset: FutData, x: Tensor):
     it directly.
     ***
 
+    @x is a (K, 2) batch of inputs; one forward pass classifies the whole batch.
+
     An example of a solution for classifying an `AV testing scenario` would be
     collision occurance, time-to-collision thresholds, traffic violations, etc.
 
@@ -169,18 +225,78 @@ def classify_validity(network: Module, dataset: FutData, x: Tensor):
     """
 
     model_x = dataset.transform_request(x)
-    true_x = dataset.input_scaler.inverse_transform(model_x)
-    return (
-        np.power(
-            network(model_x).squeeze().detach().numpy()
-            - dataset.target_scaler.transform(f(*true_x.T).reshape(1, -1)),
-            2.0,
+    true_a, true_b = dataset.inverse_input_columns(model_x)
+    net_out = network(model_x).detach()
+
+    if _fused_valid is not None:
+        out = np.empty(net_out.shape[0], dtype=np.uint8)
+        _fused_valid(
+            net_out.squeeze(-1).numpy(),
+            true_a.numpy(),
+            true_b.numpy(),
+            dataset.target_mean.item(),
+            dataset.target_std.item(),
+            THRESHOLD,
+            out,
         )
-        < THRESHOLD
+        return torch.from_numpy(out) != 0
+
+    return _validity(
+        net_out,
+        true_a,
+        true_b,
+        dataset.target_mean,
+        dataset.target_std,
+        THRESHOLD,
     )
 
 
-def load_and_explore(args: argparse.Namespace, dataset: FutData, sample_classifier):
+def make_validity(network: Module, dataset: FutData, threshold: float):
+    """
+    Partially evaluates classify_validity for a fixed network, dataset, and
+    threshold. The request transform, the per-column input stats, and the
+    threshold are baked into the closure as Python floats, so the compiler can
+    fold them into the kernels instead of re-reading dataset state per request.
+    """
+    input_min = dataset.input_min
+    input_span = dataset.input_max - dataset.input_min
+    a_mu, b_mu = dataset.input_mean.tolist()
+    a_sigma, b_sigma = dataset.input_std.tolist()
+    t_mu = dataset.target_mean.item()
+    t_sigma = dataset.target_std.item()
+
+    if _fused_valid is not None:
+
+        def validity(x: Tensor) -> Tensor:
+            model_x = input_min + x * input_span
+            true_a = model_x[:, 0] * a_sigma + a_mu
+            true_b = model_x[:, 1] * b_sigma + b_mu
+            out = np.empty(x.shape[0], dtype=np.uint8)
+            _fused_valid(
+                network(model_x).detach().squeeze(-1).numpy(),
+                true_a.numpy(),
+                true_b.numpy(),
+                t_mu,
+                t_sigma,
+                threshold,
+                out,
+            )
+            return torch.from_numpy(out) != 0
+
+        return validity
+
+    def validity(x: Tensor) -> Tensor:
+        model_x = input_min + x * input_span
+        true_a = model_x[:, 0] * a_sigma + a_mu
+        true_b = model_x[:, 1] * b_sigma + b_mu
+        truth = (0.2 * true_a * true_a - 0.1 * true_b * true_b * true_b - t_mu) / t_sigma
+        err = network(model_x).detach().squeeze(-1) - truth
+        return err * err < threshold
+
+    return torch.compile(validity, dynamic=False)
+
+
+def load_and_explore(args: argparse.Namespace, dataset: FutData, classifier_factory):
     """
     This program will load the BNN, sample a network from the BNN, and explore the
     network's input space. The function will iteratively sample the BNN until
@@ -195,24 +311,42 @@ def load_and_explore(args: argparse.Namespace, dataset: FutData, sample_classifi
     bnn = load_bnn(f"{args.model_path}/{args.model_name}")
     NDIM = 2
 
+    # At this model size, spawning intra-op threads costs more than the matmul
+    torch.set_num_threads(1)
+
     os.makedirs(f"{args.model_path}/ensemble", exist_ok=True)
 
     for i in range(args.num_networks):
         network = bnn.sample_network()
+
+        # Exploration only runs inference, and the tiny fp32 matmuls are bound
+        # on weight bandwidth; int8 dynamic quantization halves the weight
+        # bytes. The float network is kept as-is for saving below.
+        infer_net = torch.ao.quantization.quantize_dynamic(
+            network, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+        # Freeze into a single optimized TorchScript graph: constants are
+        # folded and Python module dispatch drops out of the per-request path.
+        infer_net = torch.jit.freeze(torch.jit.script(infer_net).eval())
+
+        validity_fn = classifier_factory(infer_net, dataset, args.threshold)
+
         client = setup_socket(NDIM)
 
         samples = []
 
         session_ended = False
-        while not session_ended:
-            try:
-                p = receive_request(client, NDIM)
-                cls = sample_classifier(network, dataset, p.reshape(1, -1)).squeeze()
-                samples.append((p, cls))
-                send_response(client, cls)
-            except struct.error as e:
-                client.close()
-                session_ended = True
+        with torch.inference_mode():
+            while not session_ended:
+                try:
+                    p = receive_request(client, NDIM)
+                    cls = validity_fn(p.view(1, -1))[0]
+                    samples.append((p, cls))
+                    send_response(client, cls)
+                except (struct.error, ConnectionError):
+                    client.close()
+                    session_ended = True
 
         if graphics is not None:
             print(f"Took {len(samples)} samples.")
@@ -220,7 +354,7 @@ def load_and_explore(args: argparse.Namespace, dataset: FutData, sample_classifi
             fig, (axl, axr) = plt.subplots(ncols=2)
             fig.tight_layout()
             graphics.sample_graph(samples, ax=axl)
-            graphics.brute_force_search(network, dataset, classify_validity, ax=axr)
+            graphics.brute_force_search(infer_net, dataset, classify_validity, ax=axr)
             plt.show()
 
         torch.save(
@@ -242,6 +376,8 @@ def get_mode(args: argparse.Namespace) -> str:
 def main(dataset_size: int = 2**10):
     import os
 
+    global THRESHOLD
+
     dataset = FutData(dataset_size)
     args = get_args()
     THRESHOLD = args.threshold
@@ -276,7 +412,7 @@ def main(dataset_size: int = 2**10):
 
     if do_explore:
         print("Beginning exploration.")
-        load_and_explore(args, dataset, classify_validity)
+        load_and_explore(args, dataset, make_validity)
         print("Exploration complete.")
 
 
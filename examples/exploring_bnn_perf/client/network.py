@@ -1,25 +1,16 @@
-from sklearn.model_selection import train_test_split
 import torch
 import torch.nn as nn
 
-from torch.distributions import Normal, kl_divergence
-from torch.utils.data import DataLoader
 
-
-class ConcreteLinear(nn.Module):
-    "A neural network layer, sampled from a BNN."
-
-    def __init__(self, in_features, out_features, weight=None, bias=None):
-        super(ConcreteLinear, self).__init__()
-        self.linear = nn.Linear(in_features, out_features)
-
-        if weight is not None and bias is not None:
-            with torch.no_grad():
-                self.linear.weight = nn.Parameter(weight)
-                self.linear.bias = nn.Parameter(bias)
-
-    def forward(self, x):
-        return self.linear(x)
+def concrete_linear(in_features, out_features, weight, bias) -> nn.Linear:
+    """
+    A plain nn.Linear holding weights sampled from a BNN. Built via skip_init
+    so no kaiming init is run on parameters that are immediately replaced.
+    """
+    linear = nn.utils.skip_init(nn.Linear, in_features, out_features)
+    linear.weight = nn.Parameter(weight)
+    linear.bias = nn.Parameter(bias)
+    return linear
 
 
 class BayesianLinear(nn.Module):
@@ -37,19 +28,24 @@ class BayesianLinear(nn.Module):
         self.bias_logvar = nn.Parameter(torch.zeros(out_features))
 
     def forward(self, x):
-        # Sample weights and biases from Normal distributions
+        # Reparametrization trick, without the Normal object construction and
+        # validation that torch.distributions pays per call
         weight_std = torch.exp(0.5 * self.weight_logvar)
         bias_std = torch.exp(0.5 * self.bias_logvar)
 
-        weight_dist = Normal(self.weight_mu, weight_std)
-        bias_dist = Normal(self.bias_mu, bias_std)
-
-        weight_sample = weight_dist.rsample()  # Reparametrization trick
-        bias_sample = bias_dist.rsample()
+        weight_sample = self.weight_mu + weight_std * torch.randn_like(self.weight_mu)
+        bias_sample = self.bias_mu + bias_std * torch.randn_like(self.bias_mu)
 
-        # KL divergence between posterior and prior
-        kl_weight = kl_divergence(weight_dist, Normal(0, 1)).sum()
-        kl_bias = kl_divergence(bias_dist, Normal(0, 1)).sum()
+        # Closed-form KL divergence between posterior and the N(0, 1) prior
+        kl_weight = 0.5 * (
+            self.weight_mu.pow(2)
+            + torch.exp(self.weight_logvar)
+            - self.weight_logvar
+            - 1
+        ).sum()
+        kl_bias = 0.5 * (
+            self.bias_mu.pow(2) + torch.exp(self.bias_logvar) - self.bias_logvar - 1
+        ).sum()
 
         self.kl = kl_weight + kl_bias
 
@@ -58,11 +54,19 @@ class BayesianLinear(nn.Module):
 
     def sample_concrete_weights(self):
         """Sample and return concrete weights and biases from the posterior."""
-        weight_std = torch.exp(0.5 * self.weight_logvar)
-        bias_std = torch.exp(0.5 * self.bias_logvar)
-
-        weight_sample = Normal(self.weight_mu, weight_std).rsample()
-        bias_sample = Normal(self.bias_mu, bias_std).rsample()
+        # No gradients flow through concrete samples, so the draw can be fused
+        # in-place on top of the randn allocation
+        with torch.no_grad():
+            weight_sample = (
+                torch.randn_like(self.weight_mu)
+                .mul_(torch.exp(0.5 * self.weight_logvar))
+                .add_(self.weight_mu)
+            )
+            bias_sample = (
+                torch.randn_like(self.bias_mu)
+                .mul_(torch.exp(0.5 * self.bias_logvar))
+                .add_(self.bias_mu)
+            )
 
         return weight_sample, bias_sample
 
@@ -75,64 +79,81 @@ class BayesianNN(nn.Module):
         self.bayesian_layer1 = BayesianLinear(2, 50)  # 2 inputs (a, b), 50 hidden units
         self.bayesian_layer2 = BayesianLinear(50, 1)  # 50 hidden units, 1 output (y)
 
+        # Cached so the loss doesn't have to walk modules() every step
+        self.bayesian_layers = [self.bayesian_layer1, self.bayesian_layer2]
+
     def forward(self, x):
         x = torch.relu(self.bayesian_layer1(x))
         return self.bayesian_layer2(x)
 
     def sample_network(self) -> nn.Module:
         """Sample a concrete neural network from the BNN's distribution"""
-        l1_w, l1_b = self.bayesian_layer1.sample_concrete_weights()
-        l1 = ConcreteLinear(2, 50, l1_w, l1_b)
-
-        l2_w, l2_b = self.bayesian_layer2.sample_concrete_weights()
-        l2 = ConcreteLinear(50, 1, l2_w, l2_b)
+        l1 = concrete_linear(2, 50, *self.bayesian_layer1.sample_concrete_weights())
+        l2 = concrete_linear(50, 1, *self.bayesian_layer2.sample_concrete_weights())
 
         return nn.Sequential(l1, nn.ReLU(), l2)
 
 
-def loss_fn(predictions, targets, model, kl_weight):
-    "Calculates the loss for a BNN"
+def loss_fn(predictions, targets, bayes_layers, kl_weight):
+    "Calculates the loss for a BNN given its BayesianLinear layers"
     mse_loss = nn.MSELoss()(predictions, targets)
-    kl_loss = sum(
-        [layer.kl for layer in model.modules() if isinstance(layer, BayesianLinear)]
-    )
+    kl_loss = sum(layer.kl for layer in bayes_layers)
     return mse_loss + kl_weight * kl_loss
 
 
 def train_bnn(model, optimizer, dataset, kl_weight=1e-6, epochs=1):
     "Trains the bnn @model using @dataset for @epochs."
-    train_data, test_data = train_test_split(dataset, test_size=0.1, shuffle=True)
+    # Split by index permutation on the underlying tensors; iterating the
+    # Dataset row by row just to re-stack the rows copies everything twice.
+    inputs, targets = dataset.as_tensors()
+    perm = torch.randperm(len(dataset))
+    n_test = len(dataset) // 10
+
+    test_x = inputs[perm[:n_test]]
+    test_y = targets[perm[:n_test]]
+    train_x = inputs[perm[n_test:]]
+    train_y = targets[perm[n_test:]]
+
     test_loss = []
     train_loss = []
 
-    test_x = torch.vstack([row[0] for row in test_data])
-    test_y = torch.vstack([row[1] for row in test_data])
+    # Resolved once; model may be a compile wrapper, so the attribute lookup
+    # isn't free inside the loop
+    bayes_layers = model.bayesian_layers
 
-    loader = DataLoader(train_data, 32, True)
+    batch_size = 32
 
     for epoch in range(epochs):
         model.train()
         optimizer.zero_grad()
 
-        for i, batch in enumerate(loader):
-            inputs, labels = batch
+        # Batch by slicing a shuffled index tensor; DataLoader's collate path
+        # and per-sample dispatch are pure overhead for two in-memory tensors.
+        idx = torch.randperm(train_x.size(0))
+        n_batches = 0
+        for start in range(0, train_x.size(0), batch_size):
+            b = idx[start : start + batch_size]
+            inputs, labels = train_x[b], train_y[b]
+            n_batches += 1
 
             optimizer.zero_grad()
 
             y_hat = model(inputs)
-            loss = loss_fn(y_hat, labels, model, kl_weight)
+            loss = loss_fn(y_hat, labels, bayes_layers, kl_weight)
             train_loss.append(loss.item())
             loss.backward()
             optimizer.step()
 
-            with torch.no_grad():
-                model.eval()
-                yhat = model(test_x)
-                test_loss.append(loss_fn(yhat, test_y, model, kl_weight).item())
-                model.train()
+        # Evaluate the test set once per epoch; doing this per batch makes every
+        # train step pay an extra O(|test|) forward pass.
+        with torch.no_grad():
+            model.eval()
+            yhat = model(test_x)
+            test_loss.append(loss_fn(yhat, test_y, bayes_layers, kl_weight).item())
+            model.train()
 
         print(
-            f"Epoch #{epoch + 1}: Loss = {sum(train_loss[-i:]) / i}, Test Loss = {sum(test_loss[-i:]) / i}"
+            f"Epoch #{epoch + 1}: Loss = {sum(train_loss[-n_batches:]) / n_batches}, Test Loss = {test_loss[-1]}"
         )
 
     return test_loss, train_loss
@@ -2,6 +2,7 @@ import socket
 import struct
 from time import sleep
 
+import numpy as np
 import torch
 
 
@@ -25,6 +26,10 @@ def setup_socket(ndim: int, max_attempts: int = None, fail_on_refuse=False):
     "Create the FUT's connection to SEMBAS"
     client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
+    # SEMBAS won't send the next request until it reads the 1-byte response,
+    # so never let Nagle's algorithm hold a response back.
+    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     if fail_on_refuse:
         client.connect(("127.0.0.1", 2000))
     else:
@@ -47,9 +52,8 @@ def setup_socket(ndim: int, max_attempts: int = None, fail_on_refuse=False):
 
 def receive_request(client: socket.socket, ndim: int) -> torch.Tensor:
     "Receives a request from SEMBAS, i.e. an input to classify."
-    data_size = ndim * 8  # ndim * size(f64)
-    data = client.recv(data_size)
-    return torch.tensor(struct.unpack(f"{ndim}d", data))
+    buf = recvall(client, ndim * 8)  # ndim * size(f64)
+    return torch.from_numpy(np.frombuffer(buf, dtype=np.float64).astype(np.float32))
 
 
 def send_response(client: socket.socket, cls: bool):
@@ -58,6 +62,48 @@ def send_response(client: socket.socket, cls: bool):
     client.sendall(bool_byte)
 
 
+# Receive buffers, reused across calls and keyed by message size, so the hot
+# request loop doesn't allocate a fresh bytes object per recv.
+_recv_buffers: dict[int, bytearray] = {}
+
+
+def recvall(client: socket.socket, size: int) -> memoryview:
+    """
+    Receives exactly @size bytes into a reused buffer, looping over short reads.
+    The returned view is only valid until the next call for the same size;
+    raises ConnectionError if the peer closes mid-message.
+    """
+    buf = _recv_buffers.get(size)
+    if buf is None:
+        buf = _recv_buffers[size] = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = client.recv_into(view[received:], size - received, socket.MSG_WAITALL)
+        if n == 0:
+            raise ConnectionError("Connection closed mid-message.")
+        received += n
+    return view
+
+
+def receive_request_batch(client: socket.socket, ndim: int) -> torch.Tensor:
+    """
+    Receives a framed batch of requests: a big-endian u32 count K followed by
+    K * ndim f64 points. Amortizes the per-point syscall and tensor construction
+    cost over the whole batch. Requires a server that speaks the framed batch
+    protocol; the lockstep classifier in api.rs sends one point at a time.
+    """
+    (k,) = struct.unpack("!I", recvall(client, 4))
+    buf = recvall(client, k * ndim * 8)
+    arr = np.frombuffer(buf, dtype=np.float64).astype(np.float32)
+    return torch.from_numpy(arr).reshape(k, ndim)
+
+
+def send_response_batch(client: socket.socket, cls: torch.Tensor):
+    "Sends a batch of classes (bool tensor of shape (K,)) as K packed bytes."
+    client.sendall(bytes(cls.to(torch.uint8).numpy()))
+
+
 def send_message(client: socket.socket, msg: str):
     f = client.makefile("wb")
     f.writelines([msg])